@@ -25,6 +25,14 @@ import hashlib
 import requests
 import threading
 
+import six
+
+# orjson is an optional dependency. If available, it is used to parse responses since it is faster than json.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 from pyalgotrade.utils import dt
 from pyalgotrade.bitstamp import common
 
@@ -33,63 +41,72 @@ logging.getLogger("requests").setLevel(logging.ERROR)
 
 
 def parse_datetime(dateTime):
-    try:
-        ret = datetime.datetime.strptime(dateTime, "%Y-%m-%d %H:%M:%S")
-    except ValueError:
+    # Pick the format upfront instead of trying one and catching the ValueError.
+    if "." in dateTime:
         ret = datetime.datetime.strptime(dateTime, "%Y-%m-%d %H:%M:%S.%f")
+    else:
+        ret = datetime.datetime.strptime(dateTime, "%Y-%m-%d %H:%M:%S")
     return dt.as_utc(ret)
 
 
+# Nonces must always be increasing. They follow the current time in microseconds, and only fall back to incrementing
+# the previous one if more than one nonce per microsecond is requested. This keeps nonces from different instances
+# using the same key (or from previous runs) increasing as long as requests don't outpace the clock.
 class NonceGenerator(object):
     def __init__(self):
-        self.__prev = None
+        self.__prev = 0
 
     def getNext(self):
-        ret = int(time.time())
-        if self.__prev is not None and ret <= self.__prev:
-            ret = self.__prev + 1
-        self.__prev = ret
-        return ret
+        self.__prev = max(self.__prev + 1, int(time.time() * 1000000))
+        return self.__prev
 
 
+# AccountBalance and Order parse values once, when built, instead of every time a getter is called.
 class AccountBalance(object):
     def __init__(self, jsonDict):
         self.__jsonDict = jsonDict
+        self.__usdAvailable = float(jsonDict["usd_available"])
+        self.__btcAvailable = float(jsonDict["btc_available"])
 
     def getDict(self):
         return self.__jsonDict
 
     def getUSDAvailable(self):
-        return float(self.__jsonDict["usd_available"])
+        return self.__usdAvailable
 
     def getBTCAvailable(self):
-        return float(self.__jsonDict["btc_available"])
+        return self.__btcAvailable
 
 
 class Order(object):
     def __init__(self, jsonDict):
         self.__jsonDict = jsonDict
+        self.__id = int(jsonDict["id"])
+        self.__type = jsonDict["type"]
+        self.__price = float(jsonDict["price"])
+        self.__amount = float(jsonDict["amount"])
+        self.__dateTime = parse_datetime(jsonDict["datetime"])
 
     def getDict(self):
         return self.__jsonDict
 
     def getId(self):
-        return int(self.__jsonDict["id"])
+        return self.__id
 
     def isBuy(self):
-        return self.__jsonDict["type"] == 0
+        return self.__type == 0
 
     def isSell(self):
-        return self.__jsonDict["type"] == 1
+        return self.__type == 1
 
     def getPrice(self):
-        return float(self.__jsonDict["price"])
+        return self.__price
 
     def getAmount(self):
-        return float(self.__jsonDict["amount"])
+        return self.__amount
 
     def getDateTime(self):
-        return parse_datetime(self.__jsonDict["datetime"])
+        return self.__dateTime
 
 
 class UserTransaction(object):
@@ -125,46 +142,62 @@ class HTTPClient(object):
     USER_AGENT = "PyAlgoTrade"
     REQUEST_TIMEOUT = 30
 
+    # Private API endpoints.
+    BALANCE_URL = "https://www.bitstamp.net/api/balance/"
+    OPEN_ORDERS_URL = "https://www.bitstamp.net/api/open_orders/"
+    CANCEL_ORDER_URL = "https://www.bitstamp.net/api/cancel_order/"
+    BUY_URL = "https://www.bitstamp.net/api/buy/"
+    SELL_URL = "https://www.bitstamp.net/api/sell/"
+    USER_TRANSACTIONS_URL = "https://www.bitstamp.net/api/user_transactions/"
+
     class UserTransactionType:
         MARKET_TRADE = 2
 
     def __init__(self, clientId, key, secret):
-        self.__clientId = clientId
         self.__key = key
-        self.__secret = secret
+        # The signed message is the nonce followed by the client id and the key, so the suffix is built only once.
+        self.__messageSuffix = ("%s%s" % (clientId, key)).encode("ascii")
+        if isinstance(secret, six.text_type):
+            secret = secret.encode("utf-8")
+        # The HMAC key never changes, so it gets processed only once and the resulting object copied for each signature.
+        self.__hmac = hmac.new(secret, digestmod=hashlib.sha256)
         self.__nonce = NonceGenerator()
         self.__lock = threading.Lock()
+        # Use a session to keep connections alive and avoid a new TCP/TLS handshake on every request.
+        self.__session = requests.Session()
+        self.__session.headers["User-Agent"] = HTTPClient.USER_AGENT
 
     def _buildQuery(self, params):
         # Build the signature.
         nonce = self.__nonce.getNext()
-        message = "%d%s%s" % (nonce, self.__clientId, self.__key)
-        signature = hmac.new(self.__secret, msg=message, digestmod=hashlib.sha256).hexdigest().upper()
-
-        # Headers
-        headers = {}
-        headers["User-Agent"] = HTTPClient.USER_AGENT
+        signer = self.__hmac.copy()
+        signer.update(str(nonce).encode("ascii") + self.__messageSuffix)
+        signature = signer.hexdigest().upper()
 
         # POST data.
-        data = {}
-        data.update(params)
-        data["key"] = self.__key
-        data["signature"] = signature
-        data["nonce"] = nonce
+        data = {
+            "key": self.__key,
+            "signature": signature,
+            "nonce": nonce
+        }
+        if params:
+            data.update(params)
 
-        return (data, headers)
+        return data
 
     def _post(self, url, params):
-        common.logger.debug("POST to %s with params %s" % (url, str(params)))
+        common.logger.debug("POST to %s with params %s", url, params)
 
         # Serialize access to nonce generation and http requests to avoid
-        # sending them in the wrong order.
+        # sending them in the wrong order. Bitstamp rejects requests with a
+        # nonce that is not greater than the previous one, so signed requests
+        # can't be sent concurrently.
         with self.__lock:
-            data, headers = self._buildQuery(params)
-            response = requests.post(url, headers=headers, data=data, timeout=HTTPClient.REQUEST_TIMEOUT)
+            data = self._buildQuery(params)
+            response = self.__session.post(url, data=data, timeout=HTTPClient.REQUEST_TIMEOUT)
             response.raise_for_status()
 
-        jsonResponse = response.json()
+        jsonResponse = json_loads(response.content)
 
         # Check for errors.
         if isinstance(jsonResponse, dict):
@@ -175,59 +208,40 @@ class HTTPClient(object):
         return jsonResponse
 
     def getAccountBalance(self):
-        url = "https://www.bitstamp.net/api/balance/"
-        jsonResponse = self._post(url, {})
+        jsonResponse = self._post(self.BALANCE_URL, {})
         return AccountBalance(jsonResponse)
 
     def getOpenOrders(self):
-        url = "https://www.bitstamp.net/api/open_orders/"
-        jsonResponse = self._post(url, {})
+        jsonResponse = self._post(self.OPEN_ORDERS_URL, {})
         return [Order(json_open_order) for json_open_order in jsonResponse]
 
     def cancelOrder(self, orderId):
-        url = "https://www.bitstamp.net/api/cancel_order/"
         params = {"id": orderId}
-        jsonResponse = self._post(url, params)
+        jsonResponse = self._post(self.CANCEL_ORDER_URL, params)
         if jsonResponse != True:
             raise Exception("Failed to cancel order")
 
-    def buyLimit(self, limitPrice, quantity):
-        url = "https://www.bitstamp.net/api/buy/"
-
-        # Rounding price to avoid 'Ensure that there are no more than 2 decimal places'
-        # error.
-        price = round(limitPrice, 2)
-        # Rounding amount to avoid 'Ensure that there are no more than 8 decimal places'
-        # error.
-        amount = round(quantity, 8)
-
-        params = {
-            "price": price,
-            "amount": amount
+    def _buildOrderParams(self, limitPrice, quantity):
+        # Formatting price and amount with a fixed number of decimals to avoid
+        # 'Ensure that there are no more than 2 decimal places' and
+        # 'Ensure that there are no more than 8 decimal places' errors.
+        # Rounding the floats is not enough since they could still be
+        # serialized with more decimals.
+        return {
+            "price": format(limitPrice, ".2f"),
+            "amount": format(quantity, ".8f")
         }
-        jsonResponse = self._post(url, params)
+
+    def buyLimit(self, limitPrice, quantity):
+        jsonResponse = self._post(self.BUY_URL, self._buildOrderParams(limitPrice, quantity))
         return Order(jsonResponse)
 
     def sellLimit(self, limitPrice, quantity):
-        url = "https://www.bitstamp.net/api/sell/"
-
-        # Rounding price to avoid 'Ensure that there are no more than 2 decimal places'
-        # error.
-        price = round(limitPrice, 2)
-        # Rounding amount to avoid 'Ensure that there are no more than 8 decimal places'
-        # error.
-        amount = round(quantity, 8)
-
-        params = {
-            "price": price,
-            "amount": amount
-        }
-        jsonResponse = self._post(url, params)
+        jsonResponse = self._post(self.SELL_URL, self._buildOrderParams(limitPrice, quantity))
         return Order(jsonResponse)
 
     def getUserTransactions(self, transactionType=None):
-        url = "https://www.bitstamp.net/api/user_transactions/"
-        jsonResponse = self._post(url, {})
+        jsonResponse = self._post(self.USER_TRANSACTIONS_URL, {})
         if transactionType is not None:
             jsonUserTransactions = filter(
                 lambda jsonUserTransaction: jsonUserTransaction["type"] == transactionType, jsonResponse
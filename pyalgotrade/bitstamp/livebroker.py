@@ -72,7 +72,7 @@ class TradeMonitor(threading.Thread):
         # Store the last trade id since we'll start processing new ones only.
         if len(trades):
             self.__lastTradeId = trades[-1].getId()
-            common.logger.info("Last trade found: %d" % (self.__lastTradeId))
+            common.logger.info("Last trade found: %d", self.__lastTradeId)
 
         super(TradeMonitor, self).start()
 
@@ -82,7 +82,7 @@ class TradeMonitor(threading.Thread):
                 trades = self._getNewTrades()
                 if len(trades):
                     self.__lastTradeId = trades[-1].getId()
-                    common.logger.info("%d new trade/s found" % (len(trades)))
+                    common.logger.info("%d new trade/s found", len(trades))
                     self.__queue.put((TradeMonitor.ON_USER_TRADE, trades))
             except Exception as e:
                 common.logger.critical("Error retrieving user transactions", exc_info=e)
@@ -153,14 +153,14 @@ class LiveBroker(broker.Broker):
 
         # Cash
         self.__cash = round(balance.getUSDAvailable(), 2)
-        common.logger.info("%s USD" % (self.__cash))
+        common.logger.info("%s USD", self.__cash)
         # BTC
         btc = balance.getBTCAvailable()
         if btc:
             self.__shares = {common.btc_symbol: btc}
         else:
             self.__shares = {}
-        common.logger.info("%s BTC" % (btc))
+        common.logger.info("%s BTC", btc)
 
         self.__stop = False  # No errors. Keep running.
 
@@ -171,7 +171,7 @@ class LiveBroker(broker.Broker):
         for openOrder in openOrders:
             self._registerOrder(build_order_from_open_order(openOrder, self.getInstrumentTraits(common.btc_symbol)))
 
-        common.logger.info("%d open order/s found" % (len(openOrders)))
+        common.logger.info("%d open order/s found", len(openOrders))
         self.__stop = False  # No errors. Keep running.
 
     def _startTradeMonitor(self):
@@ -203,7 +203,7 @@ class LiveBroker(broker.Broker):
                     eventType = broker.OrderEvent.Type.PARTIALLY_FILLED
                 self.notifyOrderEvent(broker.OrderEvent(order, eventType, orderExecutionInfo))
             else:
-                common.logger.info("Trade %d refered to order %d that is not active" % (trade.getId(), trade.getOrderId()))
+                common.logger.info("Trade %d refered to order %d that is not active", trade.getId(), trade.getOrderId())
 
     # BEGIN observer.Subject interface
     def start(self):
@@ -218,7 +218,7 @@ class LiveBroker(broker.Broker):
         self.__tradeMonitor.stop()
 
     def join(self):
-        if self.__tradeMonitor.isAlive():
+        if self.__tradeMonitor.is_alive():
             self.__tradeMonitor.join()
 
     def eof(self):
@@ -239,7 +239,7 @@ class LiveBroker(broker.Broker):
             if eventType == TradeMonitor.ON_USER_TRADE:
                 self._onUserTrades(eventData)
             else:
-                common.logger.error("Invalid event received to dispatch: %s - %s" % (eventType, eventData))
+                common.logger.error("Invalid event received to dispatch: %s - %s", eventType, eventData)
         except queue.Empty:
             pass
 
@@ -19,10 +19,9 @@
 """
 
 import datetime
+import random
 import time
 
-from six.moves import queue
-
 from pyalgotrade import bar
 from pyalgotrade import barfeed
 from pyalgotrade import observer
@@ -108,6 +107,13 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
     """
 
     QUEUE_TIMEOUT = 0.01
+    # Maximum number of seconds to wait for the websocket client to connect.
+    CONNECT_TIMEOUT = 30
+    # Reconnection attempts are delayed using capped exponential backoff. If RECONNECT_JITTER is True, the actual delay
+    # is picked at random between 0 and the backoff delay so clients don't reconnect all at the same time.
+    RECONNECT_BASE_DELAY = 1
+    RECONNECT_MAX_DELAY = 60
+    RECONNECT_JITTER = True
 
     def __init__(self, maxLen=None):
         super(LiveTradeFeed, self).__init__(bar.Frequency.TRADE, maxLen)
@@ -119,6 +125,13 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         self.__enableReconnection = True
         self.__stopped = False
         self.__orderBookUpdateEvent = observer.Event()
+        # Event handlers by event type. Every handler receives the event data.
+        self.__eventHandlers = {
+            wsclient.WebSocketClient.Event.TRADE: self.__onTrade,
+            wsclient.WebSocketClient.Event.ORDER_BOOK_UPDATE: self.__orderBookUpdateEvent.emit,
+            wsclient.WebSocketClient.Event.CONNECTED: self.__onConnected,
+            wsclient.WebSocketClient.Event.DISCONNECTED: self.__onDisconnected,
+        }
 
     # Factory method for testing purposes.
     def buildWebSocketClientThread(self):
@@ -134,60 +147,76 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         common.logger.info("Initializing websocket client.")
         assert self.__wsClientConnected is False, "Websocket client already connected"
 
+        # Drop the previous thread so a failure building the new one isn't mistaken for a connection.
+        self.__thread = None
         try:
             # Start the thread that runs the client.
             self.__thread = self.buildWebSocketClientThread()
             self.__thread.start()
         except Exception as e:
-            common.logger.exception("Error connecting : %s" % str(e))
+            common.logger.exception("Error connecting : %s", e)
 
         # Wait for initialization to complete.
-        while not self.__wsClientConnected and self.__thread.is_alive():
-            self.__dispatchImpl([wsclient.WebSocketClient.Event.CONNECTED])
-
-        if self.__wsClientConnected:
+        if self.__thread is not None and self.__thread.waitConnection(LiveTradeFeed.CONNECT_TIMEOUT):
+            self.__wsClientConnected = True
             common.logger.info("Initialization ok.")
         else:
             common.logger.error("Initialization failed.")
+            # Stop the client in case it is still trying to connect.
+            if self.__thread is not None and self.__thread.is_alive():
+                self.__thread.stop()
         return self.__wsClientConnected
 
-    def __onConnected(self):
+    def __onConnected(self, eventData):
         self.__wsClientConnected = True
 
-    def __onDisconnected(self):
+    def __onDisconnected(self, eventData):
         self.__wsClientConnected = False
 
         if self.__enableReconnection:
             initialized = False
+            attempt = 0
             while not self.__stopped and not initialized:
                 common.logger.info("Reconnecting")
                 initialized = self.__initializeClient()
                 if not initialized:
-                    time.sleep(5)
+                    time.sleep(self._getReconnectionDelay(attempt))
+                    attempt += 1
         else:
             self.__stopped = True
 
-    def __dispatchImpl(self, eventFilter):
-        ret = False
-        try:
-            eventType, eventData = self.__thread.getQueue().get(True, LiveTradeFeed.QUEUE_TIMEOUT)
-            if eventFilter is not None and eventType not in eventFilter:
-                return False
+    # Returns the number of seconds to wait before the next reconnection attempt.
+    def _getReconnectionDelay(self, attempt):
+        ret = min(self.RECONNECT_MAX_DELAY, self.RECONNECT_BASE_DELAY * 2 ** attempt)
+        if self.RECONNECT_JITTER:
+            ret = random.uniform(0, ret)
+        return ret
 
-            ret = True
-            if eventType == wsclient.WebSocketClient.Event.TRADE:
-                self.__onTrade(eventData)
-            elif eventType == wsclient.WebSocketClient.Event.ORDER_BOOK_UPDATE:
-                self.__orderBookUpdateEvent.emit(eventData)
-            elif eventType == wsclient.WebSocketClient.Event.CONNECTED:
-                self.__onConnected()
-            elif eventType == wsclient.WebSocketClient.Event.DISCONNECTED:
-                self.__onDisconnected()
+    def __dispatchImpl(self):
+        ret = False
+        thread = self.__thread
+        if thread is None:
+            return ret
+        eventQueue = thread.getQueue()
+        # Don't block if there are bars pending since only one gets dispatched on each call.
+        timeout = 0 if self.__barDicts else LiveTradeFeed.QUEUE_TIMEOUT
+        if not eventQueue.wait(timeout):
+            return ret
+
+        # Dispatch the events that are pending right now in a single batch. Events that get pushed while dispatching
+        # are left for the next call so a busy websocket can't starve the rest of the subjects.
+        # Lookups are hoisted out of the loop since this runs for every event.
+        getHandler = self.__eventHandlers.get
+        for eventType, eventData in eventQueue.popBatch():
+            handler = getHandler(eventType)
+            if handler is not None:
+                handler(eventData)
+                ret = True
             else:
-                ret = False
-                common.logger.error("Invalid event received to dispatch: %s - %s" % (eventType, eventData))
-        except queue.Empty:
-            pass
+                common.logger.error("Invalid event received to dispatch: %s - %s", eventType, eventData)
+            # Stop if the client was reinitialized after a disconnection. Pending events belong to the old client.
+            if thread is not self.__thread:
+                break
         return ret
 
     # Bar datetimes should not duplicate. In case trade object datetimes conflict, we just move one slightly forward.
@@ -231,7 +260,7 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
         # Note that we may return True even if we didn't dispatch any Bar
         # event.
         ret = False
-        if self.__dispatchImpl(None):
+        if self.__dispatchImpl():
             ret = True
         if super(LiveTradeFeed, self).dispatch():
             ret = True
@@ -245,7 +274,7 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
                 common.logger.info("Shutting down websocket client.")
                 self.__thread.stop()
         except Exception as e:
-            common.logger.error("Error shutting down client: %s" % (str(e)))
+            common.logger.error("Error shutting down client: %s", e)
 
     # This should not raise.
     def join(self):
@@ -253,7 +282,8 @@ class LiveTradeFeed(barfeed.BaseBarFeed):
             self.__thread.join()
 
     def eof(self):
-        return self.__stopped
+        # Events are dispatched in batches, so there may be bars left to dispatch after the client stopped.
+        return self.__stopped and len(self.__barDicts) == 0
 
     def getOrderBookUpdateEvent(self):
         """
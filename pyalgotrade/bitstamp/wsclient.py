@@ -19,8 +19,8 @@
 """
 
 import datetime
-
-from six.moves import queue
+import collections
+import threading
 
 from pyalgotrade.websocket import pusher
 from pyalgotrade.websocket import client
@@ -93,6 +93,80 @@ class OrderBookUpdate(pusher.Event):
         return [float(ask[1]) for ask in self.getData()["asks"]]
 
 
+class EventQueue(object):
+    """
+    Queue used to hand events from the websocket client thread to the feed.
+
+    There is a single producer (the websocket client) and a single consumer (the feed), and appending and
+    popping from opposite ends of a collections.deque is thread safe, so there is no need for queue.Queue locks.
+    The consumer can block in :meth:`wait` until the producer puts an event instead of polling.
+
+    Events that only matter until a newer one arrives, like order book updates, can be put using :meth:`putLatest`.
+    Only the most recent one is kept, so the queue doesn't grow if the consumer falls behind.
+    """
+
+    def __init__(self):
+        self.__events = collections.deque()
+        # A maxlen of 1 makes append replace the pending event, if any, atomically.
+        self.__latest = collections.deque(maxlen=1)
+        self.__replaced = 0
+        self.__wakeup = threading.Event()
+
+    def __len__(self):
+        return len(self.__events) + len(self.__latest)
+
+    def put(self, event):
+        self.__events.append(event)
+        self.__wakeup.set()
+
+    # Puts an event that replaces the one previously put with putLatest, if it was not popped yet.
+    # Returns True if an event was replaced.
+    def putLatest(self, event):
+        ret = len(self.__latest) > 0
+        if ret:
+            self.__replaced += 1
+        self.__latest.append(event)
+        self.__wakeup.set()
+        return ret
+
+    # Returns the number of events that were replaced before being popped.
+    def getReplacedCount(self):
+        return self.__replaced
+
+    # Returns the oldest event, or None if the queue is empty. This never blocks.
+    # Events put with putLatest are returned after the rest.
+    def pop(self):
+        try:
+            return self.__events.popleft()
+        except IndexError:
+            pass
+        try:
+            return self.__latest.popleft()
+        except IndexError:
+            return None
+
+    # Generates the events that were pending when this was called, oldest first, popping them one at a time, followed by
+    # the event put with putLatest, if any. Events that are not consumed because the caller stopped iterating are left in
+    # the queue.
+    def popBatch(self):
+        popleft = self.__events.popleft
+        for _ in range(len(self.__events)):
+            yield popleft()
+        try:
+            latest = self.__latest.popleft()
+        except IndexError:
+            return
+        yield latest
+
+    # Waits up to timeout seconds for events to be available. Returns True if there are events to pop.
+    def wait(self, timeout):
+        # The flag is cleared before checking for events so a put() right after the check still wakes us up.
+        self.__wakeup.clear()
+        if not self.__events and not self.__latest:
+            self.__wakeup.wait(timeout)
+        return len(self) > 0
+
+
 class WebSocketClient(pusher.WebSocketClient):
     """
     This websocket client class is designed to be running in a separate thread and for that reason
@@ -107,9 +181,14 @@ class WebSocketClient(pusher.WebSocketClient):
         CONNECTED = 3
         DISCONNECTED = 4
 
-    def __init__(self, queue):
+    def __init__(self, queue, onConnected=None, onDisconnected=None):
         super(WebSocketClient, self).__init__(WebSocketClient.PUSHER_APP_KEY, 5)
         self.__queue = queue
+        # Called from the websocket thread once all subscriptions succeed, right after the CONNECTED event is pushed.
+        self.__onConnected = onConnected
+        # Called from the websocket thread when the connection is lost, right before the DISCONNECTED event is pushed.
+        self.__onDisconnected = onDisconnected
+        self.__pendingSubscriptions = set()
 
     def onMessage(self, msg):
         # If we can't handle the message, forward it to Pusher WebSocketClient.
@@ -125,15 +204,20 @@ class WebSocketClient(pusher.WebSocketClient):
     # WebSocketClientBase events.
 
     def onClosed(self, code, reason):
-        common.logger.info("Closed. Code: %s. Reason: %s." % (code, reason))
-        self.__queue.put((WebSocketClient.Event.DISCONNECTED, None))
+        common.logger.info("Closed. Code: %s. Reason: %s.", code, reason)
+        self.__pushDisconnected()
 
     def onDisconnectionDetected(self):
         common.logger.warning("Disconnection detected.")
         try:
             self.stopClient()
         except Exception as e:
-            common.logger.error("Error stopping websocket client: %s." % (str(e)))
+            common.logger.error("Error stopping websocket client: %s.", e)
+        self.__pushDisconnected()
+
+    def __pushDisconnected(self):
+        if self.__onDisconnected is not None:
+            self.__onDisconnected()
         self.__queue.put((WebSocketClient.Event.DISCONNECTED, None))
 
     ######################################################################
@@ -141,18 +225,30 @@ class WebSocketClient(pusher.WebSocketClient):
 
     def onConnectionEstablished(self, event):
         common.logger.info("Connection established.")
-        self.__queue.put((WebSocketClient.Event.CONNECTED, None))
 
+        # We're not considered connected until all subscriptions succeed.
         channels = ["live_trades", "order_book"]
-        common.logger.info("Subscribing to channels %s." % channels)
-        for channel in channels:
-            self.subscribeChannel(channel)
+        common.logger.info("Subscribing to channels %s.", channels)
+        self.__pendingSubscriptions = set(channels)
+        self.subscribeChannels(channels)
+
+    def onSubscriptionSucceeded(self, event):
+        channel = event.getDict().get("channel")
+        if channel not in self.__pendingSubscriptions:
+            return
+
+        common.logger.info("Subscribed to channel %s.", channel)
+        self.__pendingSubscriptions.remove(channel)
+        if not self.__pendingSubscriptions:
+            self.__queue.put((WebSocketClient.Event.CONNECTED, None))
+            if self.__onConnected is not None:
+                self.__onConnected()
 
     def onError(self, event):
-        common.logger.error("Error: %s" % (event))
+        common.logger.error("Error: %s", event)
 
     def onUnknownEvent(self, event):
-        common.logger.warning("Unknown event: %s" % (event))
+        common.logger.warning("Unknown event: %s", event)
 
     ######################################################################
     # Bitstamp specific
@@ -161,7 +257,9 @@ class WebSocketClient(pusher.WebSocketClient):
         self.__queue.put((WebSocketClient.Event.TRADE, trade))
 
     def onOrderBookUpdate(self, orderBookUpdate):
-        self.__queue.put((WebSocketClient.Event.ORDER_BOOK_UPDATE, orderBookUpdate))
+        # Each update has the whole order book, so if the previous one was not dispatched yet it can be dropped.
+        if self.__queue.putLatest((WebSocketClient.Event.ORDER_BOOK_UPDATE, orderBookUpdate)):
+            common.logger.debug("Dropped a stale order book update (%d so far).", self.__queue.getReplacedCount())
 
 
 class WebSocketClientThread(client.WebSocketClientThreadBase):
@@ -171,28 +269,49 @@ class WebSocketClientThread(client.WebSocketClientThreadBase):
 
     def __init__(self):
         super(WebSocketClientThread, self).__init__()
-        self.__queue = queue.Queue()
+        self.__queue = EventQueue()
         self.__wsClient = None
+        self.__connected = False
+        # Set once the client gets connected or fails to do so.
+        self.__initialized = threading.Event()
 
     def getQueue(self):
         return self.__queue
 
+    def __onConnected(self):
+        self.__connected = True
+        self.__initialized.set()
+
+    def __onDisconnected(self):
+        self.__connected = False
+
+    # Blocks until the client gets connected, fails to connect, or timeout seconds elapse.
+    # Returns True if the client got connected.
+    def waitConnection(self, timeout):
+        self.__initialized.wait(timeout)
+        return self.__connected
+
     def run(self):
         super(WebSocketClientThread, self).run()
 
         # We create the WebSocketClient right in the thread, instead of doing so in the constructor,
         # because it has thread affinity.
         try:
-            self.__wsClient = WebSocketClient(self.__queue)
+            self.__wsClient = WebSocketClient(self.__queue, self.__onConnected, self.__onDisconnected)
             self.__wsClient.connect()
             self.__wsClient.startClient()
         except Exception:
-            common.logger.exception("Failed to connect: %s")
+            common.logger.exception("Failed to connect.")
+        finally:
+            # Don't keep anyone waiting for a connection that is not going to happen, and don't report a connection
+            # that is already gone.
+            self.__connected = False
+            self.__initialized.set()
 
     def stop(self):
         try:
             if self.__wsClient is not None:
                 common.logger.info("Stopping websocket client.")
-                self.__wsClient.stopClient()
+                self.__wsClient.stopClientFromThread()
         except Exception as e:
-            common.logger.error("Error stopping websocket client: %s." % (str(e)))
+            common.logger.error("Error stopping websocket client: %s.", e)
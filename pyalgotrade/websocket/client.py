@@ -18,10 +18,15 @@
 .. moduleauthor:: Gabriel Martin Becedillas Ruiz <gabriel.becedillas@gmail.com>
 """
 
-import json
 import time
 import threading
 
+# Every message received gets decoded, so use orjson if it is installed.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 import six
 from ws4py.client import tornadoclient
 import tornado
@@ -103,6 +108,9 @@ class WebSocketClientBase(tornadoclient.TornadoWebSocketClient):
         super(WebSocketClientBase, self).__init__(url)
         self.__keepAliveMgr = None
         self.__connected = False
+        # Keep a reference to the IOLoop that belongs to the thread that built this client so other threads can
+        # schedule work on it.
+        self.__ioLoop = tornado.ioloop.IOLoop.current()
 
     # This is to avoid a stack trace because TornadoWebSocketClient is not implementing _cleanup.
     def _cleanup(self):
@@ -114,7 +122,7 @@ class WebSocketClientBase(tornadoclient.TornadoWebSocketClient):
         return ret
 
     def getIOLoop(self):
-        return tornado.ioloop.IOLoop.instance()
+        return self.__ioLoop
 
     # Must be set before calling startClient().
     def setKeepAliveMgr(self, keepAliveMgr):
@@ -124,7 +132,7 @@ class WebSocketClientBase(tornadoclient.TornadoWebSocketClient):
 
     def received_message(self, message):
         try:
-            msg = json.loads(message.data)
+            msg = json_loads(message.data)
 
             if self.__keepAliveMgr is not None:
                 self.__keepAliveMgr.setAlive()
@@ -148,7 +156,7 @@ class WebSocketClientBase(tornadoclient.TornadoWebSocketClient):
         if self.__keepAliveMgr:
             self.__keepAliveMgr.stop()
             self.__keepAliveMgr = None
-        tornado.ioloop.IOLoop.instance().stop()
+        self.__ioLoop.stop()
 
         if wasConnected:
             self.onClosed(code, reason)
@@ -157,7 +165,7 @@ class WebSocketClientBase(tornadoclient.TornadoWebSocketClient):
         return self.__connected
 
     def startClient(self):
-        tornado.ioloop.IOLoop.instance().start()
+        self.__ioLoop.start()
 
     def stopClient(self):
         try:
@@ -165,7 +173,11 @@ class WebSocketClientBase(tornadoclient.TornadoWebSocketClient):
                 self.close()
             self.close_connection()
         except Exception as e:
-            logger.warning("Failed to close connection: %s" % (e))
+            logger.warning("Failed to close connection: %s", e)
+
+    # Thread safe version of stopClient. The client gets stopped by a callback scheduled in its own IOLoop.
+    def stopClientFromThread(self):
+        self.__ioLoop.add_callback(self.stopClient)
 
     ######################################################################
     # Overrides
@@ -38,7 +38,8 @@ class Event(object):
         self.__eventDict = eventDict
         self.__data = eventDict.get("data")
         if self.__data is not None and dataIsJSON:
-            self.__data = json.loads(self.__data)
+            # Uses orjson, if available, the same way messages get decoded.
+            self.__data = client.json_loads(self.__data)
 
     def __str__(self):
         return str(self.__eventDict)
@@ -91,6 +92,12 @@ class WebSocketClient(client.WebSocketClientBase):
     def subscribeChannel(self, channel):
         self.sendEvent("pusher:subscribe", {"channel": channel})
 
+    # Sends all the subscription requests back to back, without waiting for them to succeed.
+    # onSubscriptionSucceeded will get called once for each channel.
+    def subscribeChannels(self, channels):
+        for channel in channels:
+            self.subscribeChannel(channel)
+
     def sendPing(self):
         self.sendEvent("pusher:ping", None)
 
@@ -23,8 +23,8 @@ import datetime
 import time
 import threading
 import json
-
-from six.moves import queue
+import hmac
+import hashlib
 
 from . import common as tc_common
 from . import test_strategy
@@ -38,12 +38,13 @@ from pyalgotrade.bitstamp import common
 from pyalgotrade.bitcoincharts import barfeed as btcbarfeed
 from pyalgotrade import strategy
 from pyalgotrade import dispatcher
+from pyalgotrade.utils import dt
 
 
 class WebSocketClientThreadMock(threading.Thread):
     def __init__(self, events):
         threading.Thread.__init__(self)
-        self.__queue = queue.Queue()
+        self.__queue = wsclient.EventQueue()
         self.__queue.put((wsclient.WebSocketClient.Event.CONNECTED, None))
         for event in events:
             self.__queue.put(event)
@@ -53,17 +54,33 @@ class WebSocketClientThreadMock(threading.Thread):
     def getQueue(self):
         return self.__queue
 
+    def waitConnection(self, timeout):
+        return True
+
     def start(self):
         threading.Thread.start(self)
 
     def run(self):
-        while not self.__queue.empty() and not self.__stop:
+        while len(self.__queue) and not self.__stop:
             time.sleep(0.01)
 
     def stop(self):
         self.__stop = True
 
 
+class FailingWebSocketClientThreadMock(WebSocketClientThreadMock):
+    def __init__(self):
+        WebSocketClientThreadMock.__init__(self, [])
+        self.stopCalled = False
+
+    def waitConnection(self, timeout):
+        return False
+
+    def stop(self):
+        self.stopCalled = True
+        WebSocketClientThreadMock.stop(self)
+
+
 class TestingLiveTradeFeed(barfeed.LiveTradeFeed):
     def __init__(self):
         barfeed.LiveTradeFeed.__init__(self)
@@ -82,6 +99,12 @@ class TestingLiveTradeFeed(barfeed.LiveTradeFeed):
         eventDict["data"] = json.dumps(dataDict)
         self.__events.append((wsclient.WebSocketClient.Event.TRADE, wsclient.Trade(dateTime, eventDict)))
 
+    def addOrderBookUpdate(self, dateTime, bids, asks):
+        eventDict = {"data": json.dumps({"bids": bids, "asks": asks})}
+        self.__events.append(
+            (wsclient.WebSocketClient.Event.ORDER_BOOK_UPDATE, wsclient.OrderBookUpdate(dateTime, eventDict))
+        )
+
     def buildWebSocketClientThread(self):
         return WebSocketClientThreadMock(self.__events)
 
@@ -197,6 +220,285 @@ class NonceTest(unittest.TestCase):
             self.assertGreater(nonce, prevNonce)
             prevNonce = nonce
 
+    def testNonceKeepsUpWithTime(self):
+        gen = httpclient.NonceGenerator()
+        gen.getNext()
+        time.sleep(0.01)
+        # Nonces from an instance created later must not overtake the ones from the first one.
+        otherNonce = httpclient.NonceGenerator().getNext()
+        time.sleep(0.01)
+        self.assertGreater(gen.getNext(), otherNonce)
+
+
+class ParseDateTimeTestCase(tc_common.TestCase):
+    def testParseDateTime(self):
+        self.assertEqual(
+            httpclient.parse_datetime("2018-08-20 13:05:01"),
+            dt.as_utc(datetime.datetime(2018, 8, 20, 13, 5, 1))
+        )
+        self.assertEqual(
+            httpclient.parse_datetime("2018-08-20 13:05:01.123456"),
+            dt.as_utc(datetime.datetime(2018, 8, 20, 13, 5, 1, 123456))
+        )
+        with self.assertRaises(ValueError):
+            httpclient.parse_datetime("2018-08-20")
+
+
+class EventQueueTestCase(tc_common.TestCase):
+    def testPutAndPop(self):
+        eventQueue = wsclient.EventQueue()
+        self.assertFalse(eventQueue.wait(0.01))
+        self.assertEqual(eventQueue.pop(), None)
+
+        eventQueue.put(1)
+        eventQueue.put(2)
+        self.assertTrue(eventQueue.wait(0.01))
+        self.assertEqual(len(eventQueue), 2)
+        self.assertEqual(eventQueue.pop(), 1)
+        self.assertTrue(eventQueue.wait(0.01))
+        self.assertEqual(eventQueue.pop(), 2)
+        self.assertEqual(eventQueue.pop(), None)
+        self.assertFalse(eventQueue.wait(0.01))
+
+    def testPopBatch(self):
+        eventQueue = wsclient.EventQueue()
+        for i in range(5):
+            eventQueue.put(i)
+
+        popped = []
+        for event in eventQueue.popBatch():
+            popped.append(event)
+            # Events pushed while consuming a batch belong to the next one.
+            eventQueue.put(event + 5)
+        self.assertEqual(popped, [0, 1, 2, 3, 4])
+        self.assertEqual(len(eventQueue), 5)
+
+        # Events that are not consumed stay in the queue.
+        for event in eventQueue.popBatch():
+            break
+        self.assertEqual(event, 5)
+        self.assertEqual(list(eventQueue.popBatch()), [6, 7, 8, 9])
+        self.assertEqual(len(eventQueue), 0)
+
+    def testPutLatest(self):
+        eventQueue = wsclient.EventQueue()
+        self.assertFalse(eventQueue.putLatest(1))
+        self.assertTrue(eventQueue.wait(0.01))
+        self.assertTrue(eventQueue.putLatest(2))
+        self.assertTrue(eventQueue.putLatest(3))
+        self.assertEqual(eventQueue.getReplacedCount(), 2)
+        eventQueue.put(4)
+        eventQueue.put(5)
+        self.assertEqual(len(eventQueue), 3)
+
+        # The latest event goes after the rest and replaced ones are gone.
+        self.assertEqual(list(eventQueue.popBatch()), [4, 5, 3])
+        self.assertFalse(eventQueue.wait(0.01))
+
+        self.assertFalse(eventQueue.putLatest(6))
+        eventQueue.put(7)
+        self.assertEqual(eventQueue.pop(), 7)
+        self.assertEqual(eventQueue.pop(), 6)
+        self.assertEqual(eventQueue.pop(), None)
+
+    def testWakeUpFromOtherThread(self):
+        eventQueue = wsclient.EventQueue()
+        producer = threading.Timer(0.1, eventQueue.put, [1])
+        producer.start()
+        begin = time.time()
+        self.assertTrue(eventQueue.wait(10))
+        self.assertLess(time.time() - begin, 5)
+        self.assertEqual(eventQueue.pop(), 1)
+        producer.join()
+
+
+class HTTPClientTestCase(tc_common.TestCase):
+    def testSignature(self):
+        for secret in ["secret", b"secret"]:
+            client = httpclient.HTTPClient("123", "key", secret)
+            prevNonce = 0
+            for i in range(3):
+                data = client._buildQuery({"id": 1})
+                self.assertGreater(data["nonce"], prevNonce)
+                prevNonce = data["nonce"]
+                message = ("%d%s%s" % (data["nonce"], "123", "key")).encode("ascii")
+                signature = hmac.new(b"secret", msg=message, digestmod=hashlib.sha256).hexdigest().upper()
+                self.assertEqual(data["signature"], signature)
+                self.assertEqual(data["key"], "key")
+                self.assertEqual(data["id"], 1)
+
+    def testOrderParams(self):
+        client = httpclient.HTTPClient("123", "key", "secret")
+        params = client._buildOrderParams(0.1 + 0.2, 1.1 + 1.1 + 1.1)
+        self.assertEqual(params, {"price": "0.30", "amount": "3.30000000"})
+        params = client._buildOrderParams(100.555, 0.004413764)
+        self.assertEqual(params["amount"], "0.00441376")
+
+    def testOverrideURLs(self):
+        class HTTPClient(httpclient.HTTPClient):
+            OPEN_ORDERS_URL = "http://localhost/api/open_orders/"
+
+            def __init__(self):
+                super(HTTPClient, self).__init__("123", "key", "secret")
+                self.urls = []
+
+            def _post(self, url, params):
+                self.urls.append(url)
+                return []
+
+        client = HTTPClient()
+        client.getOpenOrders()
+        self.assertEqual(client.urls, ["http://localhost/api/open_orders/"])
+
+
+class WebSocketClientTestCase(tc_common.TestCase):
+    def testConnectedAfterSubscriptions(self):
+        class WebSocketClient(wsclient.WebSocketClient):
+            def __init__(self, queue, onConnected):
+                super(WebSocketClient, self).__init__(queue, onConnected)
+                self.sentEvents = []
+
+            def sendEvent(self, eventType, eventData):
+                self.sentEvents.append((eventType, eventData))
+
+        connected = []
+        eventQueue = wsclient.EventQueue()
+        wsClient = WebSocketClient(eventQueue, lambda: connected.append(True))
+        wsClient.onMessage({"event": "pusher:connection_established", "data": json.dumps({"socket_id": "1"})})
+        # Both subscriptions should be sent right away.
+        self.assertEqual(wsClient.sentEvents, [
+            ("pusher:subscribe", {"channel": "live_trades"}),
+            ("pusher:subscribe", {"channel": "order_book"}),
+        ])
+
+        subscriptionSucceeded = {"event": "pusher_internal:subscription_succeeded", "data": "{}"}
+        subscriptionSucceeded["channel"] = "order_book"
+        wsClient.onMessage(subscriptionSucceeded)
+        self.assertEqual(len(eventQueue), 0)
+        self.assertEqual(connected, [])
+
+        subscriptionSucceeded["channel"] = "live_trades"
+        wsClient.onMessage(subscriptionSucceeded)
+        self.assertEqual(eventQueue.pop(), (wsclient.WebSocketClient.Event.CONNECTED, None))
+        self.assertEqual(connected, [True])
+
+        # Duplicate notifications should be ignored.
+        wsClient.onMessage(subscriptionSucceeded)
+        self.assertEqual(len(eventQueue), 0)
+        self.assertEqual(connected, [True])
+
+    def testDisconnectedCallback(self):
+        eventQueue = wsclient.EventQueue()
+        queued = []
+        wsClient = wsclient.WebSocketClient(eventQueue, onDisconnected=lambda: queued.append(len(eventQueue)))
+        wsClient.onClosed(1000, "")
+        # The callback runs before the DISCONNECTED event is pushed.
+        self.assertEqual(queued, [0])
+        self.assertEqual(eventQueue.pop(), (wsclient.WebSocketClient.Event.DISCONNECTED, None))
+
+
+class LiveTradeFeedTestCase(tc_common.TestCase):
+    def testBurstOfTradesIsNotDelayed(self):
+        barFeed = TestingLiveTradeFeed()
+        for i in range(200):
+            barFeed.addTrade(datetime.datetime(2000, 1, 1) + datetime.timedelta(seconds=i), i, 100, 1)
+
+        bars = []
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(barFeed)
+        barFeed.getNewValuesEvent().subscribe(lambda dateTime, values: bars.append(dateTime))
+        begin = time.time()
+        disp.run()
+
+        self.assertEqual(len(bars), 200)
+        # Waiting QUEUE_TIMEOUT for every bar would take 2 seconds.
+        self.assertLess(time.time() - begin, 200 * barfeed.LiveTradeFeed.QUEUE_TIMEOUT / 4)
+
+    def testReconnectionDelay(self):
+        class Feed(TestingLiveTradeFeed):
+            RECONNECT_BASE_DELAY = 2
+            RECONNECT_MAX_DELAY = 20
+            RECONNECT_JITTER = False
+
+        barFeed = Feed()
+        self.assertEqual([barFeed._getReconnectionDelay(attempt) for attempt in range(6)], [2, 4, 8, 16, 20, 20])
+
+        Feed.RECONNECT_JITTER = True
+        for attempt in range(6):
+            for i in range(50):
+                delay = barFeed._getReconnectionDelay(attempt)
+                self.assertGreaterEqual(delay, 0)
+                self.assertLessEqual(delay, min(20, 2 * 2 ** attempt))
+
+        # Tuning a subclass doesn't affect the base class.
+        self.assertEqual(barfeed.LiveTradeFeed.RECONNECT_BASE_DELAY, 1)
+        self.assertEqual(barfeed.LiveTradeFeed.RECONNECT_MAX_DELAY, 60)
+
+    def testInitializationFailure(self):
+        class Feed(TestingLiveTradeFeed):
+            def buildWebSocketClientThread(self):
+                self.thread = FailingWebSocketClientThreadMock()
+                return self.thread
+
+        barFeed = Feed()
+        with self.assertRaisesRegexp(Exception, "Initialization failed"):
+            barFeed.start()
+        self.assertTrue(barFeed.thread.stopCalled)
+        self.assertTrue(barFeed.eof())
+        barFeed.join()
+
+    def testReconnectionAfterBuildFailure(self):
+        class Feed(TestingLiveTradeFeed):
+            RECONNECT_BASE_DELAY = 0.01
+            RECONNECT_JITTER = False
+
+            def __init__(self):
+                TestingLiveTradeFeed.__init__(self)
+                self.enableReconection(True)
+                self.builds = 0
+
+            def buildWebSocketClientThread(self):
+                self.builds += 1
+                if self.builds == 2:
+                    raise Exception("Build failed")
+                elif self.builds == 3:
+                    # Stop once the client that comes after the failure disconnects.
+                    self.enableReconection(False)
+                return TestingLiveTradeFeed.buildWebSocketClientThread(self)
+
+        barFeed = Feed()
+        barFeed.addTrade(datetime.datetime(2000, 1, 1), 1, 100, 1)
+        bars = []
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(barFeed)
+        barFeed.getNewValuesEvent().subscribe(lambda dateTime, values: bars.append(dateTime))
+        disp.run()
+
+        # The failed build must not be mistaken for a connection through the previous thread.
+        self.assertEqual(barFeed.builds, 3)
+        self.assertEqual(len(bars), 2)
+
+    def testBatchWithTradesAndOrderBookUpdates(self):
+        barFeed = TestingLiveTradeFeed()
+        for i in range(50):
+            dateTime = datetime.datetime(2000, 1, 1) + datetime.timedelta(seconds=i)
+            barFeed.addTrade(dateTime, i, 100 + i, 1)
+            barFeed.addOrderBookUpdate(dateTime, [[str(99 + i), "1"]], [[str(101 + i), "1"]])
+
+        prices = []
+        bids = []
+        disp = dispatcher.Dispatcher()
+        disp.addSubject(barFeed)
+        barFeed.getNewValuesEvent().subscribe(lambda dateTime, values: prices.append(values["BTC"].getClose()))
+        barFeed.getOrderBookUpdateEvent().subscribe(lambda orderBookUpdate: bids.append(orderBookUpdate.getBidPrices()[0]))
+        begin = time.time()
+        disp.run()
+
+        # Every event in the batch is dispatched, in order, and bars don't pay the idle wait.
+        self.assertEqual(prices, [100 + i for i in range(50)])
+        self.assertEqual(bids, [99.0 + i for i in range(50)])
+        self.assertLess(time.time() - begin, 50 * barfeed.LiveTradeFeed.QUEUE_TIMEOUT / 2)
+
 
 class TestStrategy(test_strategy.BaseStrategy):
     def __init__(self, feed, brk):
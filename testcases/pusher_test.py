@@ -87,6 +87,6 @@ class TestCase(unittest.TestCase):
         thread.start()
         thread.join(30)
         # After 30 seconds the thread should have finished.
-        if thread.isAlive():
+        if thread.is_alive():
             thread.stop()
             self.assertTrue(False)